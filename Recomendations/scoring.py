@@ -0,0 +1,153 @@
+import asyncio
+import time
+from collections import deque
+import numpy as np
+import pandas as pd
+
+from Recomendations.RecomendationalSystem import SalesDataAnalyzer
+
+
+class MicroBatchScorer:
+    def __init__(self, model, features, max_batch_size=64, max_wait_ms=5, stats_window=1000):
+        self.model = model
+        self.columns = features.columns
+        self.matrix = features.to_numpy(dtype=float)
+        self.item_index = {item_id: i for i, item_id in enumerate(features.index)}
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self.queue = None
+        self.worker = None
+        self.pending = set()
+
+        self.requests_count = 0
+        self.batches_count = 0
+        self.max_seen_batch_size = 0
+        self.batch_sizes = deque(maxlen=stats_window)
+        self.latencies = deque(maxlen=stats_window)
+
+    def _ensure_worker(self):
+        # Очередь и фоновая задача создаются в цикле событий, который обслуживает запросы
+        loop = asyncio.get_running_loop()
+        if self.worker is None or self.worker.done() or self.worker.get_loop() is not loop:
+            self.queue = asyncio.Queue()
+            self.worker = loop.create_task(self._run())
+
+    async def score(self, item_id):
+        if item_id not in self.item_index:
+            raise KeyError(f"Нет данных для товара {item_id}")
+
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self.pending.add(future)
+        future.add_done_callback(self.pending.discard)
+        started = time.perf_counter()
+        await self.queue.put((self.item_index[item_id], future))
+
+        prediction = await future
+        self.latencies.append((time.perf_counter() - started) * 1000)
+        return prediction
+
+    def close(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker = None
+
+        # Запросы, оставшиеся в очереди или в необработанной пачке, завершаются ошибкой
+        for future in list(self.pending):
+            if not future.done():
+                future.set_exception(RuntimeError("Модель рекомендаций остановлена"))
+
+    async def _collect_batch(self):
+        batch = [await self.queue.get()]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            rows = np.fromiter((row for row, _ in batch), dtype=np.intp, count=len(batch))
+            features = pd.DataFrame(self.matrix[rows], columns=self.columns)
+
+            try:
+                # Один вызов predict на всю пачку, вне цикла событий
+                predictions = await loop.run_in_executor(None, self.model.predict, features)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), prediction in zip(batch, predictions):
+                if not future.done():
+                    future.set_result(int(prediction))
+
+            self.requests_count += len(batch)
+            self.batches_count += 1
+            self.max_seen_batch_size = max(self.max_seen_batch_size, len(batch))
+            self.batch_sizes.append(len(batch))
+
+    def stats(self):
+        latencies = np.fromiter(self.latencies, dtype=float)
+        batch_sizes = np.fromiter(self.batch_sizes, dtype=float)
+
+        result = empty_stats(self.max_batch_size, self.max_wait_ms)
+        result['ready'] = True
+        result['requests'] = self.requests_count
+        result['batches'] = self.batches_count
+        result['batch_size'] = {
+            'avg': round(float(batch_sizes.mean()), 2) if len(batch_sizes) else 0,
+            'max': self.max_seen_batch_size,
+        }
+
+        if len(latencies):
+            p50, p95 = np.percentile(latencies, [50, 95])
+            result['latency_ms'] = {
+                'avg': round(float(latencies.mean()), 2),
+                'p50': round(float(p50), 2),
+                'p95': round(float(p95), 2),
+                'max': round(float(latencies.max()), 2),
+            }
+
+        return result
+
+
+def empty_stats(max_batch_size, max_wait_ms):
+    return {
+        'ready': False,
+        'max_batch_size': max_batch_size,
+        'max_wait_ms': max_wait_ms,
+        'requests': 0,
+        'batches': 0,
+        'batch_size': {'avg': 0, 'max': 0},
+        'latency_ms': {'avg': 0, 'p50': 0, 'p95': 0, 'max': 0},
+    }
+
+
+def build_scorer(db_path, max_batch_size=64, max_wait_ms=5):
+    analyzer = SalesDataAnalyzer(db_path)
+
+    data = analyzer.load_data()
+    data = analyzer.preprocess_data(data)
+
+    # Те же признаки, что и в обучающем скрипте RecomendationalSystem.py
+    X = data.drop(["item_id", "date", "payment", "sale_success"], axis=1)
+    y = data["sale_success"]
+    analyzer.train_model(X, y)
+
+    # Для каждого товара используются признаки его последней продажи
+    latest = data.sort_values("date").groupby("item_id").tail(1)
+    features = X.loc[latest.index].set_index(latest["item_id"])
+
+    return MicroBatchScorer(analyzer.model, features, max_batch_size, max_wait_ms)
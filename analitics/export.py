@@ -0,0 +1,218 @@
+import argparse
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+# Столбцы выгрузки и соответствующие им выражения SQL (как в Analytics.load_data)
+EXPORT_COLUMNS = {
+    'order_id': 'items.order_id',
+    'item_id': 'items.item_id',
+    'item_count': 'items.item_count',
+    'price': 'items.cart',
+    'payment': 'items.payment',
+    'tariff_name': 'items.tariff_name',
+    'tariff_rate': 'items.tariff_rate',
+    'item_rate': 'items.item_rate',
+    'order_date': 'orders.date',
+    'marketplace': 'marketplaces.marketplace_name',
+    'is_delivered': 'orders.is_delivered',
+}
+
+# Типы столбцов выгрузки: SQLite не гарантирует единый тип значений в столбце
+EXPORT_TYPES = {
+    'order_id': pa.int64(),
+    'item_id': pa.int64(),
+    'item_count': pa.int64(),
+    'price': pa.float64(),
+    'payment': pa.float64(),
+    'tariff_name': pa.string(),
+    'tariff_rate': pa.float64(),
+    'item_rate': pa.float64(),
+    'order_date': pa.timestamp('us'),
+    'marketplace': pa.string(),
+    'is_delivered': pa.int64(),
+}
+
+EXPORT_FORMATS = ('arrow', 'parquet')
+
+
+class _ChunkSink:
+    """Файлоподобный приёмник, накапливающий записанные байты до следующего take()."""
+
+    def __init__(self):
+        self.chunks = []
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class OrdersExport:
+    def __init__(self, db_path, left_side=None, right_side=None, marketplace=None, columns=None,
+                 batch_size=65536):
+        self.db_path = db_path
+        self.is_period = left_side is not None and right_side is not None
+        self.left_side = datetime.fromisoformat(str(left_side)).date() if left_side else None
+        self.right_side = datetime.fromisoformat(str(right_side)).date() if right_side else None
+        self.marketplace = marketplace
+        self.columns = list(columns) if columns else list(EXPORT_COLUMNS)
+        self.batch_size = batch_size
+
+        unknown = [column for column in self.columns if column not in EXPORT_COLUMNS]
+        if unknown:
+            raise ValueError(f"Неизвестные столбцы: {', '.join(unknown)}")
+
+    def _period_bounds(self, analytics_time_type):
+        # Те же границы, что и в Analytics.filter_orders
+        current_date = datetime.now().date()
+
+        if analytics_time_type == 'день':
+            return current_date, current_date
+        elif analytics_time_type == 'неделя':
+            return current_date - timedelta(days=current_date.weekday()), current_date
+        elif analytics_time_type == 'месяц':
+            return current_date.replace(day=1), current_date
+        elif analytics_time_type == 'год':
+            return current_date.replace(month=1, day=1), current_date
+        elif analytics_time_type == 'период' and self.is_period:
+            return self.left_side, self.right_side
+        return None
+
+    def build_query(self, analytics_time_type):
+        select = ',\n            '.join(f'{EXPORT_COLUMNS[column]} AS {column}' for column in self.columns)
+        query = f"""
+        SELECT
+            {select}
+        FROM items
+        JOIN orders ON items.order_id = orders.order_id
+        JOIN marketplaces ON orders.marketplace_id = marketplaces.marketplace_id
+        """
+
+        conditions, params = [], []
+        if self.marketplace:
+            conditions.append('marketplaces.marketplace_name = ?')
+            params.append(self.marketplace)
+
+        bounds = self._period_bounds(analytics_time_type)
+        if bounds is not None:
+            conditions.append('date(orders.date) BETWEEN ? AND ?')
+            params.extend(bound.isoformat() for bound in bounds)
+
+        if conditions:
+            query += 'WHERE ' + ' AND '.join(conditions)
+
+        return query, params
+
+    @property
+    def schema(self):
+        return pa.schema([(column, EXPORT_TYPES[column]) for column in self.columns])
+
+    @staticmethod
+    def _to_array(values, arrow_type):
+        if pa.types.is_timestamp(arrow_type):
+            # Даты хранятся в SQLite строками в формате ISO
+            return pa.array(values, pa.string()).cast(arrow_type)
+        return pa.array(values, arrow_type)
+
+    def iter_batches(self, analytics_time_type):
+        query, params = self.build_query(analytics_time_type)
+        schema = self.schema
+        is_empty = True
+
+        # Генератор может продолжаться в другом потоке (StreamingResponse вызывает next() в пуле потоков),
+        # поэтому проверка потока отключена: доступ к соединению и так последователен
+        with closing(sqlite3.connect(self.db_path, check_same_thread=False)) as conn:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+
+                arrays = [self._to_array(column, field.type) for column, field in zip(zip(*rows), schema)]
+                is_empty = False
+                yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+        if is_empty:
+            yield pa.RecordBatch.from_arrays([pa.array([], field.type) for field in schema], schema=schema)
+
+    @staticmethod
+    def _open_writer(sink, schema, export_format):
+        if export_format == 'arrow':
+            return pa.ipc.new_stream(sink, schema)
+        return pq.ParquetWriter(sink, schema)
+
+    def _write_batches(self, sink, analytics_time_type, export_format):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Неверный формат выгрузки: {export_format}")
+
+        writer = None
+        try:
+            with closing(self.iter_batches(analytics_time_type)) as batches:
+                for batch in batches:
+                    if writer is None:
+                        writer = self._open_writer(sink, batch.schema, export_format)
+                    if export_format == 'parquet':
+                        # Каждая пачка записывается отдельной группой строк
+                        writer.write_table(pa.Table.from_batches([batch]), row_group_size=len(batch) or None)
+                    else:
+                        writer.write_batch(batch)
+                    yield len(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def write(self, sink, analytics_time_type, export_format='parquet'):
+        return sum(self._write_batches(sink, analytics_time_type, export_format))
+
+    def stream(self, analytics_time_type, export_format='parquet'):
+        sink = _ChunkSink()
+        with closing(self._write_batches(pa.PythonFile(sink, mode='w'), analytics_time_type, export_format)) as rows:
+            for _ in rows:
+                data = sink.take()
+                if data:
+                    yield data
+
+        data = sink.take()
+        if data:
+            yield data
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Выгрузка заказов в формате Arrow IPC или Parquet')
+    parser.add_argument('output', help='Путь к файлу выгрузки')
+    parser.add_argument('--db', default='sovet5.db', help='Путь к базе данных')
+    parser.add_argument('--time-type', default='все',
+                        help='Аналитика по (день / неделя / месяц / год / период), по умолчанию все заказы')
+    parser.add_argument('--left-side', help='Левая граница периода (YYYY-MM-DD)')
+    parser.add_argument('--right-side', help='Правая граница периода (YYYY-MM-DD)')
+    parser.add_argument('--marketplace', help='Название маркетплейса')
+    parser.add_argument('--columns', help='Столбцы через запятую: ' + ', '.join(EXPORT_COLUMNS))
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='parquet', dest='export_format')
+    parser.add_argument('--batch-size', type=int, default=65536)
+    args = parser.parse_args()
+
+    columns = args.columns.split(',') if args.columns else None
+    export = OrdersExport(args.db, args.left_side, args.right_side, args.marketplace, columns, args.batch_size)
+
+    with pa.OSFile(args.output, 'wb') as sink:
+        rows = export.write(sink, args.time_type.lower(), args.export_format)
+    print(f'Выгружено строк: {rows}')
+
+
+if __name__ == '__main__':
+    main()
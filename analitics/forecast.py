@@ -0,0 +1,118 @@
+import os
+import sqlite3
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+
+# Кэш заказов: db_path -> (mtime файла базы, DataFrame с заказами)
+_orders_cache = {}
+
+
+class StockForecast:
+    def __init__(self, db_path, window_days=30, marketplace=None):
+        if window_days < 1:
+            raise ValueError("Окно расчёта скорости продаж должно быть не меньше одного дня")
+
+        self.db_path = db_path
+        self.window_days = window_days
+        self.marketplace = marketplace
+        self.orders = self.load_orders()
+        self.storage = self.load_storage()
+
+    def load_orders(self):
+        mtime = os.path.getmtime(self.db_path) if os.path.exists(self.db_path) else None
+        cached = _orders_cache.get(self.db_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        query = """
+        SELECT
+            items.item_id,
+            items.item_count,
+            orders.date AS order_date,
+            orders.marketplace_id,
+            orders.is_delivered
+        FROM items
+        JOIN orders ON items.order_id = orders.order_id
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            orders = pd.read_sql(query, conn, parse_dates=['order_date'])
+
+        _orders_cache[self.db_path] = (mtime, orders)
+        return orders
+
+    def load_storage(self):
+        with sqlite3.connect(self.db_path) as conn:
+            storage = pd.read_sql("SELECT * FROM storage", conn)
+            marketplaces = pd.read_sql("SELECT marketplace_id, marketplace_name FROM marketplaces", conn)
+
+        # Порядок столбцов такой же, как в /storage: товар, количество, маркетплейс, рейтинг
+        storage = storage.iloc[:, :4].copy()
+        storage.columns = ['item_id', 'count', 'marketplace', 'item_rate']
+
+        names = dict(zip(marketplaces['marketplace_id'], marketplaces['marketplace_name']))
+        storage['marketplace_name'] = storage['marketplace'].map(names)
+
+        if self.marketplace:
+            storage = storage[storage['marketplace_name'] == self.marketplace]
+
+        return storage.reset_index(drop=True)
+
+    def sales_velocity(self):
+        # Окно включает сегодняшний день и ровно window_days календарных дней
+        today = datetime.now().date()
+        window_start = pd.Timestamp(today - timedelta(days=self.window_days - 1)).to_datetime64()
+        window_end = pd.Timestamp(today + timedelta(days=1)).to_datetime64()
+        order_dates = self.orders['order_date'].to_numpy()
+        mask = ((order_dates >= window_start) & (order_dates < window_end) &
+                (self.orders['is_delivered'].to_numpy() == 1))
+
+        # Каждой строке склада сопоставляется код пары (товар, маркетплейс)
+        storage_keys = pd.MultiIndex.from_arrays([self.storage['item_id'], self.storage['marketplace']])
+        storage_codes, unique_keys = storage_keys.factorize()
+
+        order_keys = pd.MultiIndex.from_arrays([self.orders['item_id'].to_numpy()[mask],
+                                                self.orders['marketplace_id'].to_numpy()[mask]])
+        order_codes = unique_keys.get_indexer(order_keys)
+        known = order_codes >= 0
+
+        sold = np.bincount(order_codes[known],
+                           weights=self.orders['item_count'].to_numpy(dtype=float)[mask][known],
+                           minlength=len(unique_keys))
+
+        return sold[storage_codes] / self.window_days
+
+    def days_to_stockout(self):
+        stock = self.storage['count'].to_numpy(dtype=float)
+        velocity = self.sales_velocity()
+
+        days = np.full(len(stock), np.inf)
+        np.divide(stock, velocity, out=days, where=velocity > 0)
+        days[stock <= 0] = 0
+
+        result = self.storage.assign(velocity=velocity, days_to_stockout=days)
+        order = np.argsort(days, kind='stable')
+        return result.iloc[order].reset_index(drop=True)
+
+
+def count_stockout(marketplace, window_days):
+    db_path = '../sovet5.db'
+    result = {'error': False}
+
+    forecast = StockForecast(db_path, window_days, marketplace)
+    stockout = forecast.days_to_stockout()
+
+    days = stockout['days_to_stockout'].to_numpy()
+    finite = np.isfinite(days)
+    days_rounded = np.round(np.where(finite, days, 0), 2)
+    velocity = np.round(stockout['velocity'].to_numpy(), 2)
+
+    result['data'] = [
+        {'id': item_id, 'count': count, 'market': market, 'velocity': float(v),
+         'days_to_stockout': float(d) if f else None}
+        for item_id, count, market, v, d, f in zip(stockout['item_id'].tolist(), stockout['count'].tolist(),
+                                                    stockout['marketplace'].tolist(), velocity, days_rounded, finite)
+    ]
+
+    return result
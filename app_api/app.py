@@ -1,14 +1,46 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 from analitics.main import count_dashboard, count_charts
+from analitics.forecast import count_stockout
+from analitics.export import OrdersExport, EXPORT_FORMATS
+from Recomendations.scoring import build_scorer, empty_stats
 from db_uploader.user_data import *
 
 from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
 db_path = '../sovet5.db'
 
-app = FastAPI()
+# Ограничения микро-пачек для онлайн-рекомендаций
+scoring_max_batch_size = int(os.environ.get('SCORING_MAX_BATCH_SIZE', 64))
+scoring_max_wait_ms = float(os.environ.get('SCORING_MAX_WAIT_MS', 5))
+scorer = None
+
+
+async def load_scorer():
+    global scorer
+    try:
+        # Обучение модели выполняется в отдельном потоке, чтобы не блокировать цикл событий
+        scorer = await run_in_threadpool(build_scorer, db_path, scoring_max_batch_size, scoring_max_wait_ms)
+    except Exception as e:
+        print(e)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    scorer_task = asyncio.create_task(load_scorer())
+    yield
+    scorer_task.cancel()
+    if scorer is not None:
+        scorer.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost",
@@ -83,3 +115,107 @@ async def get_storage():
         result['error'] = True
     finally:
         return result
+
+
+@app.get('/stockout')
+async def get_stockout(window_days: int = 30, marketplace=None):
+    result = {'error': False}
+
+    try:
+        if marketplace == 'all':
+            marketplace = None
+
+        result = count_stockout(marketplace, window_days)
+
+    except Exception as e:
+        print(e)
+        result['error'] = True
+    finally:
+        return result
+
+
+async def iterate_export(first_chunk, chunks):
+    try:
+        yield first_chunk
+        async for chunk in iterate_in_threadpool(chunks):
+            yield chunk
+    finally:
+        # При обрыве соединения выгрузка закрывается сразу: освобождаются курсор и соединение с базой
+        chunks.close()
+
+
+@app.get('/export')
+async def get_export(analytics_time_type='все', left_side=None, right_side=None, marketplace=None, columns=None,
+                     export_format='parquet'):
+    result = {'error': False}
+
+    try:
+        analytics_time_type = analytics_time_type.lower()
+        if analytics_time_type == 'период':
+            left_side = left_side.split('T')[0]
+            right_side = right_side.split('T')[0]
+
+        if marketplace == 'all':
+            marketplace = None
+
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Неверный формат выгрузки: {export_format}")
+
+        columns = columns.split(',') if columns else None
+        export = OrdersExport(db_path, left_side, right_side, marketplace, columns)
+
+        if export_format == 'arrow':
+            media_type, extension = 'application/vnd.apache.arrow.stream', 'arrows'
+        else:
+            media_type, extension = 'application/vnd.apache.parquet', 'parquet'
+
+        # Запрос и запись первой пачки выполняются до отправки ответа, чтобы ошибки вернулись в виде JSON
+        chunks = export.stream(analytics_time_type, export_format)
+        first_chunk = await run_in_threadpool(next, chunks, b'')
+
+        return StreamingResponse(iterate_export(first_chunk, chunks), media_type=media_type,
+                                 headers={'Content-Disposition': f'attachment; filename="orders.{extension}"'})
+
+    except Exception as e:
+        print(e)
+        result['error'] = True
+        return result
+
+
+@app.get('/recommendation')
+async def get_recommendation(item_id: int):
+    result = {'error': False}
+
+    try:
+        if scorer is None:
+            raise RuntimeError("Модель рекомендаций ещё не готова")
+
+        sale_success = await scorer.score(item_id)
+        result['item_id'] = item_id
+        result['sale_success'] = sale_success
+        if sale_success == 0:
+            result['recommendation'] = f'Рекомендация для товара {item_id}: рассмотреть смену маркетплейса.'
+        else:
+            result['recommendation'] = None
+
+    except Exception as e:
+        print(e)
+        result['error'] = True
+    finally:
+        return result
+
+
+@app.get('/recommendation/stats')
+async def get_recommendation_stats():
+    result = {'error': False}
+
+    try:
+        if scorer is None:
+            result['data'] = empty_stats(scoring_max_batch_size, scoring_max_wait_ms)
+        else:
+            result['data'] = scorer.stats()
+    except Exception as e:
+        print(e)
+        result['error'] = True
+    finally:
+        return result
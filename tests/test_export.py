@@ -0,0 +1,83 @@
+import io
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from analitics.export import OrdersExport
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / 'sovet5.db'
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+    CREATE TABLE marketplaces (marketplace_id INTEGER, marketplace_name TEXT);
+    CREATE TABLE orders (order_id INTEGER, date TEXT, marketplace_id INTEGER, is_delivered INTEGER);
+    CREATE TABLE items (order_id INTEGER, item_id INTEGER, item_count INTEGER, cart, payment REAL,
+                        tariff_name TEXT, tariff_rate REAL, item_rate REAL);
+    INSERT INTO marketplaces VALUES (1, 'Wilberries');
+    """)
+    conn.executemany("INSERT INTO orders VALUES (?, ?, 1, 1)",
+                     [(i, f'2024-06-{i + 1:02d}') for i in range(10)])
+    # Первые пять строк без рейтинга, цена то целая, то дробная
+    conn.executemany("INSERT INTO items VALUES (?, ?, 1, ?, 100.0, 'base', NULL, ?)",
+                     [(i, i, 100 if i % 2 else 99.5, None if i < 5 else 4.5) for i in range(10)])
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+@pytest.mark.parametrize('export_format', ['arrow', 'parquet'])
+def test_nulls_in_first_batch_then_values(db_path, export_format):
+    export = OrdersExport(db_path, batch_size=4)
+
+    data = b''.join(export.stream('все', export_format))
+    if export_format == 'arrow':
+        table = pa.ipc.open_stream(data).read_all()
+    else:
+        table = pq.read_table(io.BytesIO(data))
+
+    assert table.num_rows == 10
+    assert table.schema == export.schema
+    assert table.column('item_rate').to_pylist() == [None] * 5 + [4.5] * 5
+    assert table.column('price').to_pylist()[:2] == [99.5, 100.0]
+    assert table.column('tariff_rate').null_count == 10
+
+
+def test_write_counts_rows(db_path, tmp_path):
+    export = OrdersExport(db_path, columns=['order_id', 'order_date', 'item_rate'], batch_size=4)
+
+    with pa.OSFile(str(tmp_path / 'orders.parquet'), 'wb') as sink:
+        rows = export.write(sink, 'все')
+
+    table = pq.read_table(str(tmp_path / 'orders.parquet'))
+    assert rows == 10
+    assert table.schema == export.schema
+    assert pq.ParquetFile(str(tmp_path / 'orders.parquet')).num_row_groups == 3
+
+
+def test_stream_advanced_from_different_threads(db_path):
+    export = OrdersExport(db_path, batch_size=4)
+    chunks = export.stream('все', 'arrow')
+
+    with ThreadPoolExecutor(1) as first_thread, ThreadPoolExecutor(1) as second_thread:
+        first_chunk = first_thread.submit(next, chunks).result()
+        rest = second_thread.submit(lambda: b''.join(chunks)).result()
+
+    table = pa.ipc.open_stream(first_chunk + rest).read_all()
+    assert table.num_rows == 10
+
+
+def test_closed_stream_releases_database(db_path):
+    export = OrdersExport(db_path, batch_size=4)
+    chunks = export.stream('все', 'arrow')
+    next(chunks)
+    chunks.close()
+
+    conn = sqlite3.connect(db_path, timeout=0)
+    conn.execute('BEGIN EXCLUSIVE')
+    conn.rollback()
+    conn.close()
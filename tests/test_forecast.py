@@ -0,0 +1,123 @@
+import os
+import sqlite3
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from analitics.forecast import StockForecast, count_stockout
+
+
+def days_ago(days):
+    return (date.today() - timedelta(days=days)).isoformat()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / 'sovet5.db'
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+    CREATE TABLE marketplaces (marketplace_id INTEGER, marketplace_name TEXT);
+    CREATE TABLE orders (order_id INTEGER, date TEXT, marketplace_id INTEGER, is_delivered INTEGER);
+    CREATE TABLE items (order_id INTEGER, item_id INTEGER, item_count INTEGER);
+    CREATE TABLE storage (item_id INTEGER, count INTEGER, marketplace INTEGER, item_rate REAL);
+    INSERT INTO marketplaces VALUES (1, 'Wilberries'), (2, 'Ozon');
+    INSERT INTO storage VALUES (10, 20, 1, 0), (10, 5, 2, 0), (11, 0, 1, 0), (12, 7, 1, 0), (13, 4, 2, 0);
+    """)
+    orders = [
+        # order_id, дней назад, маркетплейс, доставлен
+        (1, 0, 1, 1),
+        (2, 1, 1, 1),
+        (3, 2, 1, 1),   # последний день трёхдневного окна
+        (4, 3, 1, 1),   # за пределами трёхдневного окна
+        (5, 0, 2, 1),
+        (6, 0, 2, 0),   # не доставлен
+        (7, 1, 2, 1),
+        (8, 0, 1, 1),   # товара нет на складе
+    ]
+    conn.executemany("INSERT INTO orders VALUES (?, ?, ?, ?)",
+                     [(order_id, days_ago(ago), market, delivered) for order_id, ago, market, delivered in orders])
+    conn.executemany("INSERT INTO items VALUES (?, ?, ?)", [
+        (1, 10, 3), (2, 10, 2), (3, 10, 1), (4, 10, 100),
+        (5, 10, 6), (6, 10, 50),
+        (7, 13, 2),
+        (8, 99, 5),
+    ])
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+def velocities(stockout):
+    return {(row.item_id, row.marketplace): row.velocity for row in stockout.itertuples()}
+
+
+def test_velocity_per_item_and_marketplace(db_path):
+    stockout = StockForecast(db_path, window_days=3).days_to_stockout()
+
+    assert velocities(stockout) == pytest.approx({
+        (10, 1): 6 / 3,
+        (10, 2): 6 / 3,
+        (11, 1): 0,
+        (12, 1): 0,
+        (13, 2): 2 / 3,
+    })
+
+
+def test_window_includes_exactly_window_days(db_path):
+    one_day = velocities(StockForecast(db_path, window_days=1).days_to_stockout())
+    four_days = velocities(StockForecast(db_path, window_days=4).days_to_stockout())
+
+    assert one_day[(10, 1)] == pytest.approx(3)
+    assert one_day[(13, 2)] == 0
+    assert four_days[(10, 1)] == pytest.approx(106 / 4)
+
+
+def test_sorted_by_urgency(db_path):
+    stockout = StockForecast(db_path, window_days=3).days_to_stockout()
+
+    assert list(zip(stockout['item_id'], stockout['marketplace'])) == [
+        (11, 1), (10, 2), (13, 2), (10, 1), (12, 1),
+    ]
+    assert stockout['days_to_stockout'].tolist()[:4] == pytest.approx([0, 2.5, 6, 10])
+    assert np.isinf(stockout['days_to_stockout'].iloc[-1])
+
+
+def test_marketplace_filter(db_path):
+    stockout = StockForecast(db_path, window_days=3, marketplace='Ozon').days_to_stockout()
+
+    assert set(stockout['marketplace']) == {2}
+    assert velocities(stockout) == pytest.approx({(10, 2): 2, (13, 2): 2 / 3})
+
+
+def test_non_positive_window_rejected(db_path):
+    with pytest.raises(ValueError):
+        StockForecast(db_path, window_days=0)
+
+
+def test_orders_cache_invalidated_by_mtime(db_path):
+    first = StockForecast(db_path, window_days=3)
+    assert StockForecast(db_path, window_days=3).orders is first.orders
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO orders VALUES (9, ?, 1, 1)", (days_ago(0),))
+        conn.execute("INSERT INTO items VALUES (9, 12, 3)")
+    mtime = os.path.getmtime(db_path) + 10
+    os.utime(db_path, (mtime, mtime))
+
+    second = StockForecast(db_path, window_days=3)
+    assert second.orders is not first.orders
+    assert velocities(second.days_to_stockout())[(12, 1)] == pytest.approx(1)
+
+
+def test_count_stockout_response(db_path, tmp_path, monkeypatch):
+    # count_stockout читает базу по пути ../sovet5.db, как и остальные функции аналитики
+    workdir = tmp_path / 'app_api'
+    workdir.mkdir()
+    monkeypatch.chdir(workdir)
+
+    result = count_stockout(None, 3)
+
+    assert result['error'] is False
+    assert result['data'][0] == {'id': 11, 'count': 0, 'market': 1, 'velocity': 0.0, 'days_to_stockout': 0.0}
+    assert result['data'][-1] == {'id': 12, 'count': 7, 'market': 1, 'velocity': 0.0, 'days_to_stockout': None}
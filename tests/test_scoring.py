@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Recomendations.scoring import MicroBatchScorer
+
+
+class StubModel:
+    def __init__(self, error=None, release=None):
+        self.calls = []
+        self.error = error
+        self.release = release
+
+    def predict(self, features):
+        self.calls.append(len(features))
+        if self.release is not None:
+            self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return (features['price'].to_numpy() > 5).astype(int)
+
+
+def make_scorer(model, **kwargs):
+    features = pd.DataFrame({'price': np.arange(10, dtype=float)}, index=pd.Index(range(10), name='item_id'))
+    return MicroBatchScorer(model, features, **kwargs)
+
+
+def test_batches_capped_at_max_batch_size():
+    model = StubModel()
+    scorer = make_scorer(model, max_batch_size=4, max_wait_ms=50)
+
+    async def run():
+        try:
+            return await asyncio.gather(*[scorer.score(item_id) for item_id in range(10)])
+        finally:
+            scorer.close()
+
+    assert asyncio.run(run()) == [0] * 6 + [1] * 4
+    assert model.calls == [4, 4, 2]
+    stats = scorer.stats()
+    assert stats['requests'] == 10
+    assert stats['batches'] == 3
+    assert stats['batch_size']['max'] == 4
+
+
+def test_batch_flushed_after_max_wait():
+    model = StubModel()
+    scorer = make_scorer(model, max_batch_size=100, max_wait_ms=20)
+
+    async def run():
+        try:
+            started = time.perf_counter()
+            first = await scorer.score(7)
+            elapsed = time.perf_counter() - started
+            second = await asyncio.gather(scorer.score(1), scorer.score(2))
+            return first, second, elapsed
+        finally:
+            scorer.close()
+
+    first, second, elapsed = asyncio.run(run())
+    assert (first, second) == (1, [0, 0])
+    assert 0.015 <= elapsed < 1
+    # Одиночный запрос не ждёт заполнения пачки, следующие два попадают в одну пачку
+    assert model.calls == [1, 2]
+
+
+def test_predict_error_reaches_every_request():
+    model = StubModel(error=ValueError('broken model'))
+    scorer = make_scorer(model, max_batch_size=8, max_wait_ms=20)
+
+    async def run():
+        try:
+            return await asyncio.gather(*[scorer.score(item_id) for item_id in range(5)], return_exceptions=True)
+        finally:
+            scorer.close()
+
+    results = asyncio.run(run())
+    assert model.calls == [5]
+    assert all(isinstance(result, ValueError) and str(result) == 'broken model' for result in results)
+
+
+def test_unknown_item():
+    scorer = make_scorer(StubModel())
+
+    with pytest.raises(KeyError):
+        asyncio.run(scorer.score(100))
+
+
+def test_close_fails_pending_requests():
+    release = threading.Event()
+    model = StubModel(release=release)
+    scorer = make_scorer(model, max_batch_size=2, max_wait_ms=1)
+
+    async def run():
+        requests = [asyncio.ensure_future(scorer.score(item_id)) for item_id in range(5)]
+        while not model.calls:
+            await asyncio.sleep(0.001)
+        scorer.close()
+        results = await asyncio.gather(*requests, return_exceptions=True)
+        release.set()
+        return results
+
+    results = asyncio.run(run())
+    assert len(results) == 5
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert scorer.worker is None